@@ -7,6 +7,7 @@ import litellm
 from litellm import completion
 
 from context import rap_2026_context, verification_agent_context
+from utils.os_utils import read_text_cached
 
 logger = logging.getLogger(__name__)
 
@@ -71,33 +72,43 @@ class LLMInterface:
         self.context = self.context[0:context_count]
 
     def ask_gpt(self, prompt: str, model: str, add_context: bool = False) -> str | None:
+        return self.ask_gpt_n(prompt, model, 1, add_context)[0]
+
+    def ask_gpt_n(
+        self, prompt: str, model: str, n: int, add_context: bool = False
+    ) -> list[str | None]:
         answered = False
         message = self.context.copy() + [{"role": "user", "content": prompt}]
         print("MODEL:", model)
         print("MESSAGES:", message)
 
+        # n > 1 samples several candidates while paying for the prompt once.
+        # not every provider accepts n, so only send it when asked for.
+        kwargs: dict = {"n": n} if n > 1 else {}
+
         while not answered:
             try:
                 cmp = completion(
                     model=model,
                     messages=message,
+                    **kwargs,
                 )
                 answered = True
             except litellm.exceptions.RateLimitError as e:
                 self.logger.warning(f"Rate limit error: {e}")
                 time.sleep(1)  # wait before retrying
 
-        response: str | None = cmp.choices[0].message.content
+        responses: list[str | None] = [c.message.content for c in cmp.choices]
 
+        # only the first candidate is kept as conversation history
         if add_context:
-            self.add_context(prompt, response)
+            self.add_context(prompt, responses[0])
 
-        return response
+        return responses
 
     def _set_schema(self, schema_path: str) -> None:
         # Read XSD from 1872.1-2024
-        with open(schema_path, "r") as file:
-            self.schemas += file.read()
+        self.schemas += read_text_cached(schema_path)
 
         self.schemas += "\nThis schema is located at path: " + schema_path
 
@@ -107,8 +118,7 @@ class LLMInterface:
     def _add_additional_context_files(self, context_files: list[str]):
         context_list = []
         for c in context_files:
-            with open(c, "r") as file:
-                extra = file.read()
+            extra = read_text_cached(c)
             context_list.append(
                 {
                     "role": "user",
@@ -34,6 +34,9 @@ KNOWN_GEOJSON = [
     "reza", "ucm_graph40", "test", "none"
 ]
 
+# libyaml's C loader when PyYAML was built with it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 def rewrite_model(input_model: str) -> str:
     name, effort = input_model.split('/')
     # FIXME effort is unused
@@ -78,7 +81,7 @@ async def load_config(config_path: str = "./app/config/http_server.yaml"):
     global config_data, mission_planner
 
     with open(config_path, "r") as file:
-        config_data = yaml.safe_load(file)
+        config_data = yaml.load(file, Loader=YAML_LOADER)
 
     # Setup context files
     context_files = config_data.get("context_files", [])
@@ -119,7 +122,9 @@ async def generate_mission_xml(prompt: str, model: str) -> str:
     model = "anthropic/claude-sonnet-4-5-20250929"
     mission_planner.reset()
     xml_output, _ = mission_planner._generate_xml(prompt, model)
-    mission_planner._lint_xml(xml_output)
+    ret, err = mission_planner._lint_xml(xml_output)
+    if not ret:
+        raise Exception(f"Generated mission failed validation: {err}")
     xml_output = mission_planner.tpg.replace_tree_ids_with_gps(xml_output)
     return xml_output
 
@@ -283,13 +288,20 @@ def main():
     logger.info(f"Starting GPT Mission Planner HTTP Server on {host}:{port}")
 
     # TODO: maybe prefer 'uv run uvicorn' over calling it in python?
+    # import string (not the app object) is required for workers > 1;
+    # app_dir lets workers resolve it whatever directory we were launched from
     uvicorn.run(
-        app,
+        "http_server:app",
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
         host=host,
         port=port,
         reload=False,
         access_log=True,
-        log_level="info"
+        log_level="info",
+        # uvloop/httptools when installed, asyncio/h11 otherwise (e.g. Windows)
+        loop="auto",
+        http="auto",
+        workers=int(os.getenv("WORKERS", "1")),
     )
 
 if __name__ == "__main__":
@@ -1,16 +1,21 @@
 import logging
 import os
-from typing import Tuple, Any
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Tuple, Any
 import time
 
 import click
-import yaml
 
-from gpt_interface import LLMInterface
 from network_interface import NetworkInterface
 from utils.os_utils import (
+    execute_cancellable_cmd,
     execute_shell_cmd,
     write_out_file,
+    read_text_cached,
 )
 from utils.xml_utils import (
     parse_schema_location,
@@ -19,7 +24,11 @@ from utils.xml_utils import (
     count_xml_tasks,
 )
 from utils.spot_utils import add_init_state, init_state_macro, rename_ltl_macros
-from utils.gps_utils import TreePlacementGenerator
+
+if TYPE_CHECKING:
+    # litellm/pyproj/shapely are slow to import, only pull them in once needed
+    from gpt_interface import LLMInterface
+    from utils.gps_utils import TreePlacementGenerator
 
 LTL_KEY: str = "ltl"
 PROMELA_TEMPLATE_KEY: str = "promela_template"
@@ -31,6 +40,8 @@ ANTHROPIC: str = "claude-sonnet-4-20250514"
 GEMINI: str = "gemini/gemini-2.5-pro"
 HUMAN_REVIEW: bool = False
 EXAMPLE_RUNS: int = 5
+# number of LTL candidates sampled per request and checked by SPIN in parallel
+LTL_CANDIDATES: int = 4
 
 
 class MissionPlanner:
@@ -39,7 +50,7 @@ class MissionPlanner:
         token_path: str,
         schema_paths: list[str],
         context_files: list[str],
-        tpg: TreePlacementGenerator,
+        tpg: "TreePlacementGenerator",
         max_retries: int,
         log_directory: str = "logs",
         max_tokens: int | None = None,
@@ -75,6 +86,8 @@ class MissionPlanner:
         # retry count, managed globally to track all failures
         self.retry: int = -1
         # init gpt interface
+        from gpt_interface import LLMInterface
+
         self.gpt: LLMInterface = LLMInterface()
         self.gpt.init_context(self.schema_paths, self.context_files)
         # init Promela compiler
@@ -129,40 +142,52 @@ class MissionPlanner:
         mp_input: str = input("Enter the specifications for your mission plan: ")
         xml_input: str = mp_input
         ltl_input: str = mp_input
+        # prompt of the latest LTL request, until a candidate answer is recorded for it
+        ltl_prompt: str | None = None
         while not ret and self.retry < self.max_retries:
             # first ask of XML and LTL
             if not self.xml_valid:
                 try:
-                    ret, xml_out, xml_task_count = self._generate_xml(xml_input, True)
+                    # task counts are only compared against LTL, skip the walk otherwise
+                    xml_out, xml_task_count = self._generate_xml(
+                        xml_input, OPENAI, count=self.ltl
+                    )
+                    ret = True
                 except Exception as e:
-                    self.logger.debug(f"Error generating XML: {e}")
+                    self.logger.debug("Error generating XML: %s", e)
                     ret = False
                     xml_input = str(e)
                     self.retry += 1
                     continue
-                if not ret:
-                    self.logger.debug(f"XML generation failed: {xml_out}")
-                    xml_input = xml_out
-                    continue
                 # store file for logs
                 file_xml_out = write_out_file(self.log_directory, xml_out)
-                self.logger.debug(f"Wrote out temp XML file: {file_xml_out}")
+                self.logger.debug("Wrote out temp XML file: %s", file_xml_out)
                 self.xml_valid = True
             if not self.ltl_valid and self.ltl:
                 try:
-                    macros, ltl_out, ltl_task_count = self._generate_ltl(ltl_input)
+                    ltl_candidates = self._generate_ltl(ltl_input)
                 except Exception as e:
-                    self.logger.debug(str(e))
+                    self.logger.debug("%s", e)
                     ret = False
                     ltl_input = str(e)
                     self.retry += 1
                     continue
+                # recorded with whichever candidate gets picked below
+                ltl_prompt = ltl_input
                 self.ltl_valid = True
 
             # if we're formally verifying
             if self.ltl:
                 # preliminary check, but can be improved to be more thorough
-                if ltl_task_count != xml_task_count:
+                matching: list[Tuple[str, str, Any, int, str | None]] = [
+                    c for c in ltl_candidates if c[3] == xml_task_count
+                ]
+                if not matching:
+                    # the count feedback is about the first candidate
+                    if ltl_prompt is not None:
+                        self.pml_gpt.add_context(ltl_prompt, ltl_candidates[0][4])
+                        ltl_prompt = None
+                    ltl_task_count: int = ltl_candidates[0][3]
                     more_less: str = (
                         "more" if ltl_task_count > xml_task_count else "less"
                     )
@@ -188,16 +213,30 @@ class MissionPlanner:
                 # generate promela string that defines mission/system
                 promela_string: str = self.promela.parse_code()
                 # rename variables in LTL macros to match those used in XML/tasks
-                macros = rename_ltl_macros(
-                    self.promela.get_task_names(), self.promela.get_globals(), macros
-                )
+                candidates: list[Tuple[str, str]] = [
+                    (
+                        rename_ltl_macros(
+                            self.promela.get_task_names(),
+                            self.promela.get_globals(),
+                            m,
+                        ),
+                        ltl_out,
+                    )
+                    for m, ltl_out, _, _, _ in matching
+                ]
 
                 # checking syntax of LTL since promela is manually created
-                ret, err = self._formal_verification(promela_string, macros, ltl_out)
+                ret, err, winner = self._formal_verification(promela_string, candidates)
+                # SPIN and arbiter feedback is about the candidate spin reported on
+                if ltl_prompt is not None:
+                    self.pml_gpt.add_context(ltl_prompt, matching[winner][4])
+                    ltl_prompt = None
                 if not ret:
                     self.retry += 1
                     self.pml_gpt.add_context(err)
                     continue
+                macros = candidates[winner][0]
+                self.aut = matching[winner][2]
                 # does Arbiter LLM or the human agree?
                 ret, err = self._spot_verification(mp_input, macros)
                 if not ret:
@@ -217,23 +256,31 @@ class MissionPlanner:
                     self.xml_valid = False
                     continue
 
+            # the LLM's mission file is kept as written, GPS-resolved copy is sent
+            file_mission_out: str = file_xml_out
             if self.tpg is not None:
-                file_xml_out = self.tpg.replace_tree_ids_with_gps(file_xml_out)
-                self.logger.debug(f"Replaced tree IDs with GPS coordinates...")
-                ret, err = self._lint_xml(open(file_xml_out, "r").read())
+                file_mission_out = self.tpg.replace_tree_ids_in_file(file_xml_out)
+                self.logger.debug(
+                    "Replaced tree IDs with GPS coordinates in %s", file_mission_out
+                )
+                ret, err = self._lint_xml(Path(file_mission_out).read_text())
                 if not ret:
                     self.logger.error(
                         f"Failed to lint XML after replacing tree IDs: {err}"
                     )
+                    # ask for a new mission instead of re-linting the same one
+                    xml_input = err
+                    self.xml_valid = False
+                    self.retry += 1
                     continue
 
             # failure of this will only occur if formal verification was enabled.
             # otherwise it sends out XML mission via TCP
             if ret:
                 # send off mission plan to TCP client
-                self.nic.send_file(file_xml_out)
+                self.nic.send_file(file_mission_out)
                 self.logger.debug(
-                    f"Sending mission XML {file_xml_out} out to robot over TCP..."
+                    "Sending mission XML %s out to robot over TCP...", file_mission_out
                 )
             else:
                 self.logger.error("Unable to formally verify from your prompt...")
@@ -249,7 +296,8 @@ class MissionPlanner:
         task_count: int = 0
         # generate XML mission
         xml_out: str | None = self.gpt.ask_gpt(prompt, model, True)
-        self.logger.debug(xml_out)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("%s", xml_out)
         xml: str = parse_code(xml_out)
         # validate XML output
         # self._lint_xml(xml)
@@ -258,24 +306,43 @@ class MissionPlanner:
 
         return xml, task_count
 
-    def _generate_ltl(self, prompt: str) -> Tuple[str, str, int]:
+    def _generate_ltl(self, prompt: str) -> list[Tuple[str, str, Any, int, str | None]]:
         from utils.spot_utils import count_ltl_tasks
 
-        task_count: int = 0
-        # use second GPT agent to generate LTL
-        ltl_out: str | None = self.pml_gpt.ask_gpt(prompt, True)
-        macros: str = parse_code(ltl_out, "promela")
-        # parse out LTL statement
-        ltl: str = parse_code(ltl_out, "ltl")
-        self.logger.debug(f"Generated Promela macros: {macros}")
-
-        self.logger.debug(f"Generated LTL: {ltl}")
-
-        # ask SPOT/Claude to generate automata for arbiter
-        self.aut = self._convert_to_spot(ltl)
-        task_count = count_ltl_tasks(self.aut)
-
-        return macros, ltl, task_count
+        candidates: list[Tuple[str, str, Any, int, str | None]] = []
+        err: Exception | None = None
+        err_out: str | None = None
+        # use second GPT agent to generate several LTL candidates in one request.
+        # the conversation only records the candidate that is eventually chosen
+        ltl_outs: list[str | None] = self.pml_gpt.ask_gpt_n(
+            prompt, OPENAI, LTL_CANDIDATES, False
+        )
+        for ltl_out in ltl_outs:
+            try:
+                macros: str = parse_code(ltl_out, "promela")
+                # parse out LTL statement
+                ltl: str = parse_code(ltl_out, "ltl")
+                self.logger.debug("Generated Promela macros: %s", macros)
+
+                self.logger.debug("Generated LTL: %s", ltl)
+
+                # ask SPOT/Claude to generate automata for arbiter
+                aut: Any = self._convert_to_spot(ltl)
+            except Exception as e:
+                # one malformed candidate shouldn't discard its siblings
+                self.logger.debug("Discarding LTL candidate: %s", e)
+                err = e
+                err_out = ltl_out
+                continue
+            candidates.append((macros, ltl, aut, count_ltl_tasks(aut), ltl_out))
+
+        if not candidates:
+            assert err is not None
+            # the error is fed back next, so it has to follow the answer it is about
+            self.pml_gpt.add_context(prompt, err_out)
+            raise err
+
+        return candidates
 
     def _convert_to_spot(self, ltl: str) -> Any:
         if self.ltl:
@@ -289,56 +356,105 @@ class MissionPlanner:
 
             return aut
 
-    def _lint_xml(self, xml_out: str):
-        # path to selected schema based on xsi:schemaLocation
-        selected_schema: str = parse_schema_location(xml_out)
-        self.logger.debug(f"Schema selected by GPT: {selected_schema}")
-        # validate mission based on XSD
-        validate_output(selected_schema, xml_out)
+    def _lint_xml(self, xml_out: str) -> Tuple[bool, str]:
+        try:
+            # path to selected schema based on xsi:schemaLocation
+            selected_schema: str = parse_schema_location(xml_out)
+            self.logger.debug("Schema selected by GPT: %s", selected_schema)
+            # validate mission based on XSD
+            validate_output(selected_schema, xml_out)
+        except Exception as e:
+            return False, str(e)
+
+        return True, ""
 
     def _formal_verification(
-        self, promela_string: str, macros: str, ltl_out: str
-    ) -> Tuple[bool, str]:
+        self, promela_string: str, candidates: list[Tuple[str, str]]
+    ) -> Tuple[bool, str, int]:
         ret: bool = False
 
         self.logger.info("Performing formal verification of LTL mission plan...")
         # generates the LTL and verifies it with SPIN; retry enabled
-        ret, e = self._ltl_validation(promela_string, macros, ltl_out)
+        ret, e, winner = self._ltl_validation(promela_string, candidates)
         if ret:
             self.logger.info("Successful LTL mission plan generation...")
-            self.logger.debug(f"Promela description in file {self.promela_path}.")
+            self.logger.debug("Promela description in file %s.", self.promela_path)
         else:
             self.logger.error(
                 "Failed to validate mission... Please see Promela error above."
             )
 
-        return ret, e
+        return ret, e, winner
 
     def _ltl_validation(
-        self, promela_string: str, macros: str, ltl_out: str
-    ) -> Tuple[bool, str]:
+        self, promela_string: str, candidates: list[Tuple[str, str]]
+    ) -> Tuple[bool, str, int]:
         ret: bool = False
-
-        macros = init_state_macro(macros)
-        ltl_out = add_init_state(ltl_out)
-        self.logger.debug(f"Promela macros: {macros}")
-        self.logger.debug(f"Promela LTL: {ltl_out}")
-
-        # append to promela file
-        new_promela_string: str = promela_string + "\n" + macros + "\n" + ltl_out
-        # write pml system and LTL to file
-        self.promela_path = write_out_file(self.log_directory, new_promela_string)
-        # execute spin verification
-        cli_ret, e = execute_shell_cmd(
-            [self.spin_path, "-search", "-a", "-O2", self.promela_path]
+        winner: int = 0
+        outputs: dict[int, str] = {}
+        promela_paths: list[str] = []
+        out_dirs: list[str] = []
+
+        for macros, ltl_out in candidates:
+            macros = init_state_macro(macros)
+            ltl_out = add_init_state(ltl_out)
+            self.logger.debug("Promela macros: %s", macros)
+            self.logger.debug("Promela LTL: %s", ltl_out)
+
+            # append to promela file
+            new_promela_string: str = promela_string + "\n" + macros + "\n" + ltl_out
+            # concurrent spin runs each need their own directory for pan/trail files
+            out_dir: str = (
+                self.log_directory
+                if len(candidates) == 1
+                else tempfile.mkdtemp(dir=self.log_directory)
+            )
+            out_dirs.append(out_dir)
+            # write pml system and LTL to file
+            promela_paths.append(write_out_file(out_dir, new_promela_string))
+
+        # execute spin verification of every candidate concurrently, but take the
+        # results in candidate order so the lowest-index pass wins on every run
+        cancel: threading.Event = threading.Event()
+        pool = ThreadPoolExecutor(
+            max_workers=min(len(promela_paths), os.cpu_count() or 1)
         )
-        # if you didn't get an error from validation step, no more retries
-        if cli_ret != 0:
-            self.logger.error(f"Failed to execute spin command with syntax error: {e}")
-        else:
-            ret = True
+        futures = [pool.submit(self._run_spin, p, cancel) for p in promela_paths]
+        try:
+            for i, f in enumerate(futures):
+                cli_ret, out = f.result()
+                outputs[i] = out
+                # if you didn't get an error from validation step, no more retries
+                if cli_ret == 0:
+                    ret = True
+                    winner = i
+                    break
+        finally:
+            # stop the losing candidates' spin runs, started or not
+            cancel.set()
+            pool.shutdown(wait=True, cancel_futures=True)
 
-        return ret, e
+        if not ret:
+            # report the failure of the model's first choice
+            self.logger.error(
+                f"Failed to execute spin command with syntax error: {outputs[winner]}"
+            )
+        self.promela_path = promela_paths[winner]
+
+        # only the reported candidate's pml, pan and trail files are kept
+        for i, out_dir in enumerate(out_dirs):
+            if i != winner and out_dir != self.log_directory:
+                shutil.rmtree(out_dir, ignore_errors=True)
+
+        return ret, outputs[winner], winner
+
+    def _run_spin(self, promela_path: str, cancel: threading.Event) -> Tuple[int, str]:
+        # execute spin from the promela file's directory so pan/trail files land there
+        return execute_cancellable_cmd(
+            [self.spin_path, "-search", "-a", "-O2", os.path.basename(promela_path)],
+            cancel,
+            cwd=os.path.dirname(promela_path),
+        )
 
     def _spot_verification(self, mission_query: str, macros: str) -> Tuple[bool, str]:
         from utils.spot_utils import generate_accepting_run_string
@@ -353,24 +469,22 @@ class MissionPlanner:
 
         if self.human_review:
             resp: str = ""
-            while resp != ("y" or "n"):
-                resp = input(
-                    "Here are 5 example executions of your mission: "
-                    + runs_str
-                    + "\nNote, these are just several possible runs. \n\nType y/n."
-                )
+            # build once so a mistyped answer doesn't reformat the runs
+            review_prompt: str = (
+                "Here are 5 example executions of your mission: "
+                + runs_str
+                + "\nNote, these are just several possible runs. \n\nType y/n."
+            )
+            while resp not in ("y", "n"):
+                resp = input(review_prompt).strip().lower()
 
-                if resp == "y":
-                    self.logger.info("Mission proceeding...")
-                    ret = True
-                    break
-                elif resp == "n":
-                    self.logger.info(
-                        "Conflict between mission and validator... Let's try again."
-                    )
-                    break
-                else:
-                    continue
+            if resp == "y":
+                self.logger.info("Mission proceeding...")
+                ret = True
+            else:
+                self.logger.info(
+                    "Conflict between mission and validator... Let's try again."
+                )
         else:
             ask = (
                 'Please answer this with one word: "Yes" or "No". \
@@ -380,17 +494,18 @@ class MissionPlanner:
                 Mission request: \n'
                 + mission_query
                 + "\nContext:\n"
-                + "".join([open(f).read() for f in self.context_files])
+                + "".join([read_text_cached(f) for f in self.context_files])
                 + "\nAtomic Proposition definitions:\n"
                 + macros
                 + "\nExample runs:\n"
                 + runs_str
             )
-            self.logger.debug(f"Asking Arbiter: {ask}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("Asking Arbiter: %s", ask)
             acceptance = self.verification_checker.ask_gpt(ask, True)
             assert isinstance(acceptance, str)
 
-            self.logger.debug(f"Arbiter says {acceptance}")
+            self.logger.debug("Arbiter says %s", acceptance)
 
             if "yes" in acceptance.lower():
                 self.logger.info("Arbiter approves. Mission proceeding...")
@@ -400,7 +515,7 @@ class MissionPlanner:
                 e = self.verification_checker.ask_gpt(
                     "Can you explain why you disagree?"
                 )
-                self.logger.debug(str(e))
+                self.logger.debug("%s", e)
 
             self.verification_checker.reset_context(
                 self.verification_checker.initial_context_length
@@ -413,17 +528,15 @@ class MissionPlanner:
         return ret, e
 
     def _evaluate_spin_trail(self) -> Tuple[bool, str]:
-        pml_file: str = self.promela_path.split("/")[-1]
+        pml_file: Path = Path(self.promela_path)
         e: str = ""
         ret: bool = True
 
-        # trail file means you failed
-        if os.path.isfile(pml_file + ".trail"):
-            # move trail file since the promela file gets sent to self.log_directory
-            os.replace(pml_file + ".trail", self.promela_path + ".trail")
+        # trail file means you failed; spin ran next to the promela file so it's already there
+        if pml_file.with_name(pml_file.name + ".trail").exists():
             # run trail
             cli_ret, trail_out = execute_shell_cmd(
-                [self.spin_path, "-t", self.promela_path]
+                [self.spin_path, "-t", pml_file.name], cwd=str(pml_file.parent)
             )
             if cli_ret != 0:
                 self.logger.error(
@@ -448,8 +561,14 @@ class MissionPlanner:
     help="YAML config file",
 )
 def main(config: str):
+    import yaml
+    from utils.gps_utils import TreePlacementGenerator
+
     with open(config, "r") as file:
-        config_yaml: dict = yaml.safe_load(file)
+        # libyaml's C loader when PyYAML was built with it
+        config_yaml: dict = yaml.load(
+            file, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        )
 
     context_files: list[str] = []
 
@@ -1,6 +1,12 @@
+import os
 import socket
 import logging
 
+# files below this size are sent with a single send call
+SMALL_FILE_BYTES: int = 32768
+# hint to the kernel that the FIN from shutdown follows; not available everywhere
+MSG_MORE: int = getattr(socket, "MSG_MORE", 0)
+
 
 class NetworkInterface:
     def __init__(self, logger: logging.Logger, host="127.0.0.1", port=12345):
@@ -12,19 +18,20 @@ class NetworkInterface:
             socket.AF_INET, socket.SOCK_STREAM
         )
         self.client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # don't let Nagle hold back the tail of a mission waiting for an ACK
+        self.client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 
     def init_socket(self) -> None:
         self.client_socket.connect((self.host, self.port))
 
     def send_file(self, file_path) -> None:
-        bytes_sent: int = 0
-
         try:
             with open(file_path, "rb") as file:
-                chunk: bytes = file.read(1024)
-                while chunk:
-                    bytes_sent += self.client_socket.send(chunk)
-                    chunk = file.read(1024)
+                if os.fstat(file.fileno()).st_size < SMALL_FILE_BYTES:
+                    # whole mission in one segment, FIN from shutdown rides along
+                    self.client_socket.sendall(file.read(), MSG_MORE)
+                else:
+                    self.client_socket.sendfile(file)
 
             # Signal that we're done sending data
             self.client_socket.shutdown(socket.SHUT_WR)
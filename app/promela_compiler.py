@@ -1,10 +1,32 @@
 import logging
 import sys
+from typing import Callable
 
 from lxml import etree
 
+from utils.os_utils import read_text_cached
 from xml_types import ControlTags, ActionTags, ConditionalTags
 
+# plain str tag names, resolved once instead of through the Enum per node
+_BEHAVIOR_TREE_TAG: str = ControlTags.BehaviorTree.value
+_SEQUENCE_TAG: str = ControlTags.Sequence.value
+_FALLBACK_TAG: str = ControlTags.Fallback.value
+_PARALLEL_TAG: str = ControlTags.Parallel.value
+_ASSERT_TRUE_TAG: str = ConditionalTags.AssertTrue.value
+_CHECK_VALUE_TAG: str = ConditionalTags.CheckValue.value
+_ELSE: str = ":: else ->\n"
+_ELSE_SKIP: str = ":: else -> skip\n"
+_ACTION_TYPE_EQ: str = ".action.actionType = "
+_ACTION_TAGS: frozenset[str] = frozenset(a.value for a in ActionTags)
+_CONDITIONAL_TAGS: frozenset[str] = frozenset(c.value for c in ConditionalTags)
+
+# missions are only walked by tag, so drop comments/whitespace and skip the ID index
+_PARSER: etree.XMLParser = etree.XMLParser(
+    remove_comments=True, remove_blank_text=True, collect_ids=False, huge_tree=True
+)
+# BehaviorTree/Sequence holding the mission; lxml compiles and caches the path
+_MAIN_SEQUENCE_PATH: str = f"{_BEHAVIOR_TREE_TAG}/{_SEQUENCE_TAG}"
+
 SENSOR_FN: str = """
 proctype select_{}() {{
     d_step {{
@@ -27,6 +49,8 @@ class PromelaCompiler:
         # keeping track of specific sensors used from list
         self.sensors_used: list[str] = []
         self.globals_used: list[str] = []
+        # rendered declarations of globals_used, built on first get_globals()
+        self._globals_cache: str | None = None
         self.xml_comp_to_promela: dict = {
             "lt": "<",
             "lte": "<=",
@@ -36,36 +60,41 @@ class PromelaCompiler:
             "neq": "!=",
         }
 
-    def init_xml_tree(self, xml_file: str) -> None:
-        self.root: etree._Element = etree.fromstring(xml_file)
+    def init_xml_tree(self, xml_file: str | bytes) -> None:
+        if isinstance(xml_file, str):
+            xml_file = xml_file.encode()
+        self.root: etree._Element = etree.fromstring(xml_file, _PARSER)
 
     def parse_code(self) -> str:
-        promela_code: str = self.promela_template
         task_defs: list[str] = []
         execution_calls: list[str] = []
         self.reset()
 
-        task_sequence: etree._Element = self.root.find("BehaviorTree").find("Sequence")
+        task_sequence: etree._Element | None = self.root.find(_MAIN_SEQUENCE_PATH)
+        if task_sequence is None:
+            raise ValueError("Mission has no BehaviorTree with a root Sequence")
 
         self._define_tree(task_sequence, task_defs, execution_calls)
 
         self.task_names = "".join(task_defs)
-        global_list: list[str] = [f"int {x};\n" for x in self.globals_used]
 
-        # Concatenate task definitions and execution calls
-        promela_code += "\n"
-        promela_code += self.task_names
-        promela_code += "\n"
-        promela_code += "".join(global_list)
-        promela_code += "\ninit {\n    atomic {\n"
-        promela_code += "".join(execution_calls)
-        promela_code += "\n    }\n}"
+        # Concatenate task definitions and execution calls in a single join
+        parts: list[str] = [
+            self.promela_template,
+            "\n",
+            self.task_names,
+            "\n",
+            self.get_globals(),
+            "\ninit {\n    atomic {\n",
+            *execution_calls,
+            "\n    }\n}",
+        ]
 
-        return promela_code
+        return "".join(parts)
 
     def set_promela_template(self, promela_template_path: str) -> None:
-        with open(promela_template_path, "r") as file:
-            self.promela_template: str = file.read()
+        # shared across instances, only re-read if the template changes on disk
+        self.promela_template: str = read_text_cached(promela_template_path)
 
     def get_promela_template(self) -> str:
         return self.promela_template
@@ -74,13 +103,16 @@ class PromelaCompiler:
         return self.task_names
 
     def get_globals(self) -> str:
-        return "".join([f"int {g};\n" for g in self.globals_used])
+        if self._globals_cache is None:
+            self._globals_cache = "".join([f"int {g};\n" for g in self.globals_used])
+        return self._globals_cache
 
     def reset(self) -> None:
         self.task_names = ""
         # keeping track of specific sensors used from list
         self.sensors_used = []
         self.globals_used = []
+        self._globals_cache = None
 
     def _define_tree(
         self,
@@ -89,81 +121,80 @@ class PromelaCompiler:
         execution_calls: list[str],
         indent: str = "    ",
         fallback: bool = False,
-    ):
-        else_statement: str = ":: else ->"
-        sequence_count: int = len(sequence.findall("Sequence"))
-
-        for t in sequence:
-            if t.tag == ControlTags.Sequence:
+    ) -> None:
+        # bound once per frame, these are used for every child
+        td_append: Callable[[str], None] = task_defs.append
+        ec_append: Callable[[str], None] = execution_calls.append
+        outer_indent: str = indent[:-4]
+        inner_indent: str = indent + "    "
+        sequence_count: int = sum(1 for _ in sequence.iterchildren(_SEQUENCE_TAG))
+
+        # elements only; comments/PIs are filtered by lxml without Python proxies
+        for t in sequence.iterchildren(etree.Element):
+            if t.tag == _SEQUENCE_TAG:
                 # recurse
                 self._define_tree(t, task_defs, execution_calls, indent)
                 sequence_count -= 1
                 if fallback:
                     if sequence_count > 0:
-                        execution_calls.append(indent[:-4] + else_statement + "\n")
+                        ec_append(outer_indent + _ELSE)
                     else:
-                        execution_calls.append(indent[:-4] + else_statement + " skip\n")
+                        ec_append(outer_indent + _ELSE_SKIP)
                     fallback = False
-            elif t.tag == ControlTags.Fallback:
-                execution_calls.append(indent + "if\n")
-                execution_calls.append(indent + ":: ")
-                self._define_tree(t, task_defs, execution_calls, indent + "    ", True)
-                execution_calls.append(indent + "fi\n")
-            elif t.tag == ControlTags.Parallel:
+            elif t.tag == _FALLBACK_TAG:
+                ec_append(indent + "if\n")
+                ec_append(indent + ":: ")
+                self._define_tree(t, task_defs, execution_calls, inner_indent, True)
+                ec_append(indent + "fi\n")
+            elif t.tag == _PARALLEL_TAG:
                 pass  # TODO
-            elif t.tag in ActionTags.__dict__.values():
-                if t.get("name") is not None:
-                    task_defs.append("Task " + t.get("name") + ";\n")
-                    execution_calls.append(
-                        indent + t.get("name") + ".action.actionType = " + t.tag + ";\n"
-                    )
+            elif t.tag in _ACTION_TAGS:
+                name: str | None = t.get("name")
+                if name is not None:
+                    td_append("Task " + name + ";\n")
+                    ec_append(indent + name + _ACTION_TYPE_EQ + t.tag + ";\n")
                 # we assume its a Condition
-            elif t.tag in ConditionalTags.__dict__.values():
-                if t.tag == ConditionalTags.AssertTrue:
-                    result: str = t.get("result")
+            elif t.tag in _CONDITIONAL_TAGS:
+                # the select has to run before the enclosing Fallback's "if" / ":: "
+                # guard, which are the last two entries; insert(-2) only shifts those two
+                if t.tag == _ASSERT_TRUE_TAG:
+                    result: str | None = t.get("result")
                     if result is not None:
+                        r: str = result[1:-1]
                         execution_calls.insert(
-                            -2,
-                            (
-                                indent[:-4]
-                                + "select ({} : {}..{});\n\n".format(
-                                    result[1:-1], "0", "1"
-                                )
-                            ),
+                            -2, f"{outer_indent}select ({r} : 0..1);\n\n"
                         )
-                        execution_calls.append(f"{result[1:-1]} == 1 ->\n")
-                        self._add_global(result[1:-1])
+                        ec_append(f"{r} == 1 ->\n")
+                        self._add_global(r)
                     continue
-                elif t.tag == ConditionalTags.CheckValue:
-                    val: str = t.get("value")
-                    threshold: str = t.get("threshold")
-                    comp: str = t.get("comp")
+                elif t.tag == _CHECK_VALUE_TAG:
+                    val: str | None = t.get("value")
+                    threshold: str | None = t.get("threshold")
+                    comp: str | None = t.get("comp")
+                    if val is None or threshold is None or comp is None:
+                        self.logger.warning(
+                            "CheckValue missing value, threshold or comp: %s",
+                            t.attrib,
+                        )
+                        continue
+                    v: str = val[1:-1]
+                    th: int = int(threshold)
                     execution_calls.insert(
-                        -2,
-                        (
-                            indent[:-4]
-                            + "select ({} : {}..{});\n\n".format(
-                                val[1:-1],
-                                str(int(threshold) - 1),
-                                str(int(threshold) + 1),
-                            )
-                        ),
+                        -2, f"{outer_indent}select ({v} : {th - 1}..{th + 1});\n\n"
                     )
-                    if val is not None and threshold is not None and comp is not None:
-                        execution_calls.append(
-                            f"{val[1:-1]} {self.xml_comp_to_promela[comp]} {threshold} ->\n"
-                        )
-                        self._add_global(val[1:-1])
+                    ec_append(f"{v} {self.xml_comp_to_promela[comp]} {threshold} ->\n")
+                    self._add_global(v)
                     continue
             else:
-                self.logger.warning(f"Unknown tag in XML: {t.tag}")
+                self.logger.warning("Unknown tag in XML: %s", t.tag)
 
     def _add_global(self, action_type: str) -> str:
         self.globals_used.append(action_type)
+        self._globals_cache = None
         return action_type
 
 
-def main():
+def main() -> None:
     logger: logging.Logger = logging.getLogger(__name__)
     logging.basicConfig(level=logging.DEBUG)
 
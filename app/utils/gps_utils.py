@@ -6,6 +6,9 @@ using coordinate transformations between WGS84 and UTM projections.
 """
 
 import math
+import os
+import stat
+import tempfile
 from typing import List, Tuple, Dict, Any, Optional
 
 import numpy as np
@@ -41,10 +44,15 @@ class CoordinateSystem:
             always_xy=True,
         )
 
-    def latlon_to_xy(self, lat: float, lon: float) -> Tuple[float, float]:
+    def latlon_to_xy(
+        self, lat: float | np.ndarray, lon: float | np.ndarray
+    ) -> Tuple[Any, Any]:
         """
         Convert latitude/longitude to UTM coordinates.
 
+        Accepts scalars or equally shaped arrays; arrays are transformed in a
+        single pyproj call.
+
         Args:
             lat: Latitude in decimal degrees
             lon: Longitude in decimal degrees
@@ -54,10 +62,15 @@ class CoordinateSystem:
         """
         return self._to_utm_transformer.transform(lon, lat)
 
-    def xy_to_latlon(self, x: float, y: float) -> Tuple[float, float]:
+    def xy_to_latlon(
+        self, x: float | np.ndarray, y: float | np.ndarray
+    ) -> Tuple[Any, Any]:
         """
         Convert UTM coordinates to latitude/longitude.
 
+        Accepts scalars or equally shaped arrays; arrays are transformed in a
+        single pyproj call.
+
         Args:
             x: X coordinate in UTM projection
             y: Y coordinate in UTM projection
@@ -90,6 +103,32 @@ class TreePlacementGenerator:
         self.tolerance_pct = tolerance_pct
         self.polygon_coords = self._make_polygon_array(polygon_coords)
         self.dimensions = self._make_dimension_array(dimensions)
+        # tree placements as parallel arrays, indexed by tree_index - 1
+        self._row: np.ndarray = np.empty(0, dtype=np.int64)
+        self._col: np.ndarray = np.empty(0, dtype=np.int64)
+        self._lat: np.ndarray = np.empty(0, dtype=np.float64)
+        self._lon: np.ndarray = np.empty(0, dtype=np.float64)
+
+    @property
+    def tree_points(self) -> List[Dict[str, Any]]:
+        """Tree placements as a list of dicts, materialized on demand."""
+        return [
+            {
+                "tree_index": i + 1,
+                "row": row,
+                "col": col,
+                "lat": lat,
+                "lon": lon,
+            }
+            for i, (row, col, lat, lon) in enumerate(
+                zip(
+                    self._row.tolist(),
+                    self._col.tolist(),
+                    self._lat.tolist(),
+                    self._lon.tolist(),
+                )
+            )
+        ]
 
     def generate_tree_points(
         self,
@@ -109,168 +148,166 @@ class TreePlacementGenerator:
             - lat: Latitude in decimal degrees
             - lon: Longitude in decimal degrees
         """
-        # Convert to UTM and create polygon
-        polygon_xy = [
-            self.coord_system.latlon_to_xy(lat, lon) for lon, lat in self.polygon_coords
-        ]
-        top_edge_start = self.polygon_coords[0]
-        top_edge_end = self.polygon_coords[1]
-
-        # Get top edge coordinates in UTM
-        top_start_xy = self.coord_system.latlon_to_xy(
-            top_edge_start[1], top_edge_start[0]
+        # Convert all vertices to UTM in one call and create polygon
+        xs, ys = self.coord_system.latlon_to_xy(
+            self.polygon_coords[:, 1], self.polygon_coords[:, 0]
         )
-        top_end_xy = self.coord_system.latlon_to_xy(top_edge_end[1], top_edge_end[0])
+        polygon_xy = list(zip(xs, ys))
+
+        # Top edge coordinates in UTM
+        top_start_xy = polygon_xy[0]
+        top_end_xy = polygon_xy[1]
 
         # Calculate rotation to make top edge horizontal
         rotation_info = self._calculate_rotation(top_start_xy, top_end_xy)
 
         # Transform polygon to local coordinate system
-        poly_local = self._transform_polygon_to_local(polygon_xy, rotation_info)
+        local_coords = self._transform_polygon_to_local(polygon_xy, rotation_info)
 
         # Generate tree points
-        self.tree_points = self._generate_points_in_local_system(
-            poly_local, self.dimensions, rotation_info
+        self._generate_points_in_local_system(
+            local_coords, self.dimensions, rotation_info
         )
         return self.tree_points
 
     def replace_tree_ids_with_gps(self, xml_str: str) -> str:
         """Replace the id attribute of MoveToTreeID elements with their GPS coordinates."""
         root = etree.fromstring(xml_str)
-        for tree_elem in root.findall(".//MoveToTreeID"):
-            id = tree_elem.get("id")
-            if id is None:
-                continue
-            gps_coords = self.tree_points[int(id) - 1]
-            if gps_coords:
-                # Set the latitude and longitude attributes to the GPS values
-                tree_elem.set("latitude", f"{gps_coords['lat']}")
-                tree_elem.set("longitude", f"{gps_coords['lon']}")
-                # Remove the id attribute
-                tree_elem.attrib.pop("id", None)
-                # Change the tag name to MoveToGPSLocation (no namespace)
-                tree_elem.tag = "MoveToGPSLocation"
+        self._set_tree_gps(root)
 
         etree.indent(root, space="    ")  # 4 spaces indentation
         return etree.tostring(root, pretty_print=True, encoding="unicode")
 
+    def replace_tree_ids_in_file(self, xml_path: str) -> str:
+        """Same as replace_tree_ids_with_gps, but for a mission file.
+
+        The result goes to a new file next to xml_path, whose path is returned,
+        so the mission as the LLM wrote it is kept.
+        """
+        tree = etree.parse(xml_path)
+        self._set_tree_gps(tree.getroot())
+
+        etree.indent(tree, space="    ")  # 4 spaces indentation
+        # same temp-file scheme as write_out_file, but libxml2 serializes
+        # straight into it instead of through an intermediate str
+        with tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(xml_path), delete=False, suffix=".xml"
+        ) as out_file:
+            tree.write(out_file, pretty_print=True, encoding="utf-8")
+
+        os.chmod(out_file.name, stat.S_IRWXU | stat.S_IRWXG | stat.S_IRWXO)
+
+        return out_file.name
+
+    def _set_tree_gps(self, root: etree._Element) -> None:
+        """Rewrite every MoveToTreeID under root into a MoveToGPSLocation."""
+        # elements are edited in place, so no nodes are created or removed
+        for tree_elem in root.iter("MoveToTreeID"):
+            id = tree_elem.get("id")
+            if id is None:
+                continue
+            idx = int(id) - 1
+            # Set the latitude and longitude attributes to the GPS values
+            tree_elem.set("latitude", f"{self._lat[idx].item()}")
+            tree_elem.set("longitude", f"{self._lon[idx].item()}")
+            # Remove the id attribute
+            del tree_elem.attrib["id"]
+            # Change the tag name to MoveToGPSLocation (no namespace)
+            tree_elem.tag = "MoveToGPSLocation"
+
     def _make_polygon_array(self, coords) -> np.ndarray:
         """Create a 2D array representing the polygon coordinates."""
-        coords_array = []
-        for p in coords:
-            if len(p) != 2:
-                raise ValueError("Each coordinate must be a tuple of (lon, lat).")
-            lon = p["lon"]
-            lat = p["lat"]
-            # Create a 2D array for each coordinate
-            coords_array.append([lon, lat])
-        return np.array(coords_array, dtype=np.float64)
+        if any(len(p) != 2 for p in coords):
+            raise ValueError("Each coordinate must be a tuple of (lon, lat).")
+        # fill the lon/lat columns directly, no per-point [lon, lat] lists
+        coords_array = np.empty((len(coords), 2), dtype=np.float64)
+        coords_array[:, 0] = [p["lon"] for p in coords]
+        coords_array[:, 1] = [p["lat"] for p in coords]
+        return coords_array
 
     def _make_dimension_array(self, dimensions: list) -> np.ndarray:
         """Create a 2D array representing the dimensions of the planting area."""
-        shape = []
-        for d in dimensions:
-            if len(d) != 2 or "row" not in d or "col" not in d:
-                raise ValueError(
-                    "Each dimension must be a dictionary with 'row' and 'col' keys."
-                )
-            col = d["col"]
-            row = d["row"]
-            # Create a 2D array for each dimension
-            shape += [col] * row
-        return np.array(shape, dtype=np.uint8)
+        if any(len(d) != 2 or "row" not in d or "col" not in d for d in dimensions):
+            raise ValueError(
+                "Each dimension must be a dictionary with 'row' and 'col' keys."
+            )
+        # each block contributes `row` rows of `col` trees
+        return np.repeat(
+            [d["col"] for d in dimensions], [d["row"] for d in dimensions]
+        ).astype(np.uint8)
 
     def _calculate_rotation(
         self, start_point: Tuple[float, float], end_point: Tuple[float, float]
-    ) -> Dict[str, float]:
+    ) -> Dict[str, Any]:
         """Calculate rotation parameters to align top edge horizontally."""
         dx = end_point[0] - start_point[0]
         dy = end_point[1] - start_point[1]
         theta = math.atan2(dy, dx)
+        cos_a = np.cos(-theta)
+        sin_a = np.sin(-theta)
 
         return {
-            "cos_a": np.cos(-theta),
-            "sin_a": np.sin(-theta),
+            "cos_a": cos_a,
+            "sin_a": sin_a,
             "origin_x": start_point[0],
             "origin_y": start_point[1],
+            # 2x2 rotation matrix and origin for the vectorized transforms
+            "R": np.array([[cos_a, -sin_a], [sin_a, cos_a]]),
+            "origin": np.array([start_point[0], start_point[1]]),
         }
 
     def _transform_polygon_to_local(
-        self, polygon_xy: List[Tuple[float, float]], rotation_info: Dict[str, float]
-    ) -> Polygon:
+        self, polygon_xy: List[Tuple[float, float]], rotation_info: Dict[str, Any]
+    ) -> np.ndarray:
         """Transform polygon coordinates to local rotated coordinate system."""
-        cos_a = rotation_info["cos_a"]
-        sin_a = rotation_info["sin_a"]
-        origin_x = rotation_info["origin_x"]
-        origin_y = rotation_info["origin_y"]
-
-        poly_local_coords = []
-        for x, y in polygon_xy:
-            # Translate to origin
-            x_shifted = x - origin_x
-            y_shifted = y - origin_y
+        pts = np.asarray(polygon_xy, dtype=np.float64)
 
-            # Rotate
-            x_rot = cos_a * x_shifted - sin_a * y_shifted
-            y_rot = sin_a * x_shifted + cos_a * y_shifted
+        # Translate to origin and rotate all vertices at once
+        local = (pts - rotation_info["origin"]) @ rotation_info["R"].T
 
-            poly_local_coords.append((x_rot, y_rot))
-
-        return Polygon(poly_local_coords)
+        return local
 
     def _generate_points_in_local_system(
         self,
-        poly_local: Polygon,
+        local_coords: np.ndarray,
         trees_per_row: List[int],
-        rotation_info: Dict[str, float],
-    ) -> List[Dict[str, Any]]:
+        rotation_info: Dict[str, Any],
+    ) -> None:
         """Generate tree points within the local coordinate system."""
 
-        # Get polygon boundary coords (assumes 4-point polygon for orchard block)
-        coords = list(poly_local.exterior.coords)
+        # Polygon corners (assumes 4-point polygon for orchard block)
         # Order: top-left, top-right, bottom-right, bottom-left
-        top_left, top_right, bottom_right, bottom_left = (
-            coords[0],
-            coords[1],
-            coords[2],
-            coords[3],
-        )
-
-        rows = len(trees_per_row)
-        tree_points = []
-        tree_counter = 1
-
-        for row_index, num_trees in enumerate(trees_per_row):
-            t = row_index / (rows - 1) if rows > 1 else 0  # interpolation factor
-
-            # Interpolate row start and end along polygon edges
-            row_start_x = (1 - t) * top_left[0] + t * bottom_left[0]
-            row_start_y = (1 - t) * top_left[1] + t * bottom_left[1]
-            row_end_x = (1 - t) * top_right[0] + t * bottom_right[0]
-            row_end_y = (1 - t) * top_right[1] + t * bottom_right[1]
-
-            for col_index in range(num_trees):
-                u = (
-                    col_index / (num_trees - 1) if num_trees > 1 else 0.5
-                )  # interpolation factor across row
-                x = (1 - u) * row_start_x + u * row_end_x
-                y = (1 - u) * row_start_y + u * row_end_y
-
-                # Transform back to global coords
-                lat, lon = self._transform_to_global_coords(x, y, rotation_info)
-
-                tree_points.append(
-                    {
-                        "tree_index": tree_counter,
-                        "row": row_index + 1,
-                        "col": col_index + 1,
-                        "lat": lat,
-                        "lon": lon,
-                    }
-                )
-                tree_counter += 1
-
-        return tree_points
+        top_left, top_right, bottom_right, bottom_left = local_coords[:4]
+
+        counts = np.asarray(trees_per_row, dtype=np.int64)
+        rows = len(counts)
+
+        # Interpolate every row start and end along polygon edges, shape (rows, 2)
+        t = (np.arange(rows) / (rows - 1) if rows > 1 else np.zeros(rows))[:, None]
+        row_start = (1 - t) * top_left + t * bottom_left
+        row_end = (1 - t) * top_right + t * bottom_right
+
+        # Flatten the ragged rows: per-tree row/col indices and factor across row
+        row_index = np.repeat(np.arange(rows), counts)
+        row_offset = np.repeat(np.cumsum(counts) - counts, counts)
+        col_index = np.arange(counts.sum()) - row_offset
+        span = np.repeat(counts - 1, counts)
+        # interpolation factor across row, single-tree rows sit in the middle
+        u = np.full(len(span), 0.5)
+        np.divide(col_index, span, out=u, where=span > 0)
+        u = u[:, None]
+
+        local = (1 - u) * row_start[row_index] + u * row_end[row_index]
+        local_x = local[:, 0]
+        local_y = local[:, 1]
+
+        # Transform every tree back to global coords in one batch
+        lats, lons = self._transform_to_global_coords(local_x, local_y, rotation_info)
+
+        self._row = row_index + 1
+        self._col = col_index + 1
+        self._lat = np.atleast_1d(lats)
+        self._lon = np.atleast_1d(lons)
 
     def _find_polygon_width_at_y(
         self, poly_local: Polygon, y: float, min_x: float, max_x: float
@@ -308,17 +345,18 @@ class TreePlacementGenerator:
             return start_x + col_index / (num_trees - 1) * (end_x - start_x)
 
     def _transform_to_global_coords(
-        self, x: float, y: float, rotation_info: Dict[str, float]
-    ) -> Tuple[float, float]:
+        self,
+        x: float | np.ndarray,
+        y: float | np.ndarray,
+        rotation_info: Dict[str, Any],
+    ) -> Tuple[Any, Any]:
         """Transform local coordinates back to global lat/lon."""
-        cos_a = rotation_info["cos_a"]
-        sin_a = rotation_info["sin_a"]
-        origin_x = rotation_info["origin_x"]
-        origin_y = rotation_info["origin_y"]
-
-        # Reverse rotation
-        x_global = cos_a * x + sin_a * y + origin_x
-        y_global = -sin_a * x + cos_a * y + origin_y
+        local = np.column_stack((np.atleast_1d(x), np.atleast_1d(y)))
+
+        # Reverse rotation (R is orthonormal, so its inverse is R.T) and translation
+        global_xy = local @ rotation_info["R"] + rotation_info["origin"]
+        x_global = global_xy[:, 0]
+        y_global = global_xy[:, 1]
 
         # Convert back to lat/lon
         return self.coord_system.xy_to_latlon(x_global, y_global)
@@ -1,23 +1,64 @@
 from typing import Tuple
+import functools
 import tempfile
 import subprocess
 import os
+import signal
 import stat
+import threading
 
+# how often a cancellable command checks whether it should stop
+_CANCEL_POLL_S: float = 0.1
 
-def execute_shell_cmd(command: list) -> Tuple[int, str]:
+
+def execute_shell_cmd(command: list, cwd: str | None = None) -> Tuple[int, str]:
     ret: int = 0
     out: str = ""
 
     try:
-        out = str(subprocess.check_output(command))
+        out = subprocess.check_output(command, cwd=cwd, text=True, errors="replace")
     except subprocess.CalledProcessError as err:
         ret = err.returncode
-        out = str(err.output)
+        out = err.output or ""
 
     return ret, out
 
 
+def execute_cancellable_cmd(
+    command: list, cancel: threading.Event, cwd: str | None = None
+) -> Tuple[int, str]:
+    # own session, so a cancel also stops anything the command spawned (cc, pan)
+    with subprocess.Popen(
+        command,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        text=True,
+        errors="replace",
+        start_new_session=True,
+    ) as proc:
+        while True:
+            try:
+                out, _ = proc.communicate(timeout=_CANCEL_POLL_S)
+                break
+            except subprocess.TimeoutExpired:
+                if cancel.is_set():
+                    _terminate_process_group(proc)
+                    out, _ = proc.communicate()
+                    break
+
+    return proc.returncode, out or ""
+
+
+def _terminate_process_group(proc: subprocess.Popen) -> None:
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    else:
+        proc.terminate()
+
+
 def write_out_file(dir: str, mp_out: str | None) -> str:
     assert isinstance(mp_out, str)
 
@@ -31,3 +72,16 @@ def write_out_file(dir: str, mp_out: str | None) -> str:
     os.chmod(temp_file_name, stat.S_IRWXU | stat.S_IRWXG | stat.S_IRWXO)
 
     return temp_file_name
+
+
+@functools.lru_cache(maxsize=32)
+def _read_text(path: str, mtime_ns: int, size: int, inode: int) -> str:
+    # the stat fields are only part of the cache key, a rewrite of the file misses
+    with open(path, "rb") as file:
+        return file.read().decode()
+
+
+def read_text_cached(path: str) -> str:
+    # meant for static inputs (schemas, templates, context files), not per-run output
+    st: os.stat_result = os.stat(path)
+    return _read_text(path, st.st_mtime_ns, st.st_size, st.st_ino)
@@ -1,13 +1,32 @@
 import random
 
 import re
+from typing import Any
+
+# compiled once at import instead of going through re's cache on every call
+_LTL_HEAD = re.compile(r"ltl\s+\w+\s*{")
+_TASK_DECL = re.compile(r"Task\s+(\w+);")
+_GLOBAL_DECL = re.compile(r"int\s+(\w+);")
+_PAREN_CONTENT = re.compile(r"\(([^)]+)\)")
+_ORDER_COMPARATOR = re.compile(r"[<>]=?")
+_IDENTIFIER = re.compile(r"\b([a-zA-Z_][a-zA-Z0-9_]*)\b")
+_ACTION_TYPE_VAR = re.compile(r"\b([a-zA-Z_][a-zA-Z0-9_]*)\b(?=\.action\.actionType)")
+
+
+def _strip_ltl_block(expression: str) -> str:
+    # drop an optional 'ltl <label> {' head and trailing '}' around the formula
+    expression = expression.strip()
+    head = _LTL_HEAD.match(expression)
+    if head is not None:
+        expression = expression[head.end() :].strip()
+    if expression.endswith("}"):
+        expression = expression[:-1].strip()
+    return expression
 
 
 def regex_spin_to_spot(expression: str) -> str:
     # --- Step 1: Strip 'ltl <label> {' and trailing '}' ---
-    expression = expression.strip()
-    expression = re.sub(r"^ltl\s+\w+\s*{", "", expression).strip()
-    expression = re.sub(r"}\s*$", "", expression).strip()
+    expression = _strip_ltl_block(expression)
 
     # --- Step 2: Wrap in <> if not already ---
     if not expression.startswith("<>"):
@@ -18,9 +37,7 @@ def regex_spin_to_spot(expression: str) -> str:
 
 def add_init_state(expression: str) -> str:
     # --- Step 1: Strip 'ltl <label> {' and trailing '}' ---
-    expression = expression.strip()
-    expression = re.sub(r"^ltl\s+\w+\s*{", "", expression).strip()
-    expression = re.sub(r"}\s*$", "", expression).strip()
+    expression = _strip_ltl_block(expression)
 
     expression = f"init && X ({expression})"
 
@@ -31,28 +48,39 @@ def init_state_macro(macros: str) -> str:
     # ensure that the initial state is defined in the LTL macros
     updated_macros: str = ""
     if "#define init" not in macros:
-        match = re.search(r"\(.*?==", macros)
-        if match is not None:
-            first_line = match.group(0)
-            init_macro = "#define init " + first_line + " 0)\n"
-            updated_macros = init_macro + macros
+        # first "(" followed by "==" on the same line, up to and including the "=="
+        lp = macros.find("(")
+        while lp != -1:
+            eq = macros.find("==", lp)
+            nl = macros.find("\n", lp)
+            if eq != -1 and (nl == -1 or eq < nl):
+                first_line = macros[lp : eq + 2]
+                init_macro = "#define init " + first_line + " 0)\n"
+                updated_macros = init_macro + macros
+                break
+            lp = macros.find("(", lp + 1)
     return updated_macros
 
 
 def generate_accepting_run_string(aut) -> str:
     import spot
+
     curr = aut.get_init_state_number()
     path = []
+    # outgoing edges per state, self-loops dropped so a pick always moves
+    edges_cache: dict[int, list[Any]] = {}
     while not aut.state_is_accepting(curr):
-        edges = [e for e in aut.out(curr)]
+        edges = edges_cache.get(curr)
+        if edges is None:
+            edges = [e for e in aut.out(curr) if e.dst != curr]
+            if not edges:
+                edges = [e for e in aut.out(curr)]
+            edges_cache[curr] = edges
 
-        next = curr
-        while next == curr:
-            sel_e = random.choice(edges)
-            next = sel_e.dst
+        sel_e = random.choice(edges)
 
         # move
-        curr = next
+        curr = sel_e.dst
 
         path.append(spot.bdd_format_formula(aut.get_dict(), sel_e.cond))
 
@@ -79,12 +107,10 @@ def rename_ltl_macros(task_names_str, globals_str, original_ltl):
     """
 
     # Extract task names using regex
-    task_pattern = r"Task\s+(\w+);"
-    tasks = re.findall(task_pattern, task_names_str)
+    tasks = _TASK_DECL.findall(task_names_str)
 
     # Extract global variables using regex
-    global_pattern = r"int\s+(\w+);"
-    globals_vars = re.findall(global_pattern, globals_str)
+    globals_vars = _GLOBAL_DECL.findall(globals_str)
 
     # Split LTL into individual #define statements
     define_lines = [
@@ -97,7 +123,7 @@ def rename_ltl_macros(task_names_str, globals_str, original_ltl):
 
     for line in define_lines:
         # Extract the content inside parentheses
-        paren_match = re.search(r"\(([^)]+)\)", line)
+        paren_match = _PAREN_CONTENT.search(line)
         if not paren_match:
             corrected_lines.append(line)
             continue
@@ -106,7 +132,8 @@ def rename_ltl_macros(task_names_str, globals_str, original_ltl):
 
         # Check if this is a global variable comparison (has comparison but NOT .action.actionType)
         has_action_type = ".action.actionType" in content
-        has_comparison = bool(re.search(r"[<>]=?", content))  # Only lt, gt, lte, gte
+        # Only lt, gt, lte, gte
+        has_comparison = bool(_ORDER_COMPARATOR.search(content))
 
         is_global_comparison = has_comparison and not has_action_type
 
@@ -114,7 +141,7 @@ def rename_ltl_macros(task_names_str, globals_str, original_ltl):
             # This is a global variable comparison - replace with global variable
             if global_index < len(globals_vars):
                 # Find the variable name to replace (before the comparison operator)
-                var_match = re.search(r"\b([a-zA-Z_][a-zA-Z0-9_]*)\b", content)
+                var_match = _IDENTIFIER.search(content)
                 if var_match:
                     old_var = var_match.group(1)
                     new_line = line.replace(old_var, globals_vars[global_index])
@@ -128,9 +155,7 @@ def rename_ltl_macros(task_names_str, globals_str, original_ltl):
             # This is a task operation - replace with task name
             if task_index < len(tasks):
                 # Find the variable name to replace (before .action.actionType)
-                var_match = re.search(
-                    r"\b([a-zA-Z_][a-zA-Z0-9_]*)\b(?=\.action\.actionType)", content
-                )
+                var_match = _ACTION_TYPE_VAR.search(content)
                 if var_match:
                     old_var = var_match.group(1)
                     new_line = line.replace(old_var, tasks[task_index])
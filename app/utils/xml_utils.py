@@ -1,14 +1,27 @@
+import functools
+import io
+import os
 from typing import Tuple
 
 from lxml import etree
 
 from app.xml_types import AttributeTags, ControlTags, ActionTags
 
+# shared by every validation, missions don't use xml:id lookups
+_PARSER: etree.XMLParser = etree.XMLParser(collect_ids=False, huge_tree=False)
+# plain str names, resolved once instead of through the Enum per call
+_SCHEMA_LOCATION_ATTR: str = AttributeTags.SchemaLocation.value
+_ACTION_TAGS: frozenset[str] = frozenset(a.value for a in ActionTags)
+_BEHAVIOR_TREE_TAG: str = ControlTags.BehaviorTree.value
+_SEQUENCE_TAG: str = ControlTags.Sequence.value
+_FALLBACK_TAG: str = ControlTags.Fallback.value
+
 
 def parse_schema_location(xml_mp: str) -> str:
-    root: etree._Element = etree.fromstring(xml_mp)
-    location = root.attrib[AttributeTags.SchemaLocation]
-    return location
+    # only the root start tag is needed, stop before building the rest of the tree
+    for _, root in etree.iterparse(io.BytesIO(xml_mp.encode()), events=("start",)):
+        return root.attrib[_SCHEMA_LOCATION_ATTR]
+    raise ValueError("XML mission has no root element.")
 
 
 def parse_code(mp_out: str | None, code_type: str = "xml") -> str:
@@ -17,19 +30,30 @@ def parse_code(mp_out: str | None, code_type: str = "xml") -> str:
     if "```" not in mp_out:
         return mp_out
 
-    xml_response: str = mp_out.split("```" + code_type + "\n")[1]
-    xml_response = xml_response.split("```")[0]
-    return xml_response
+    # slice between the fences instead of splitting the whole response
+    fence: str = "```" + code_type + "\n"
+    start: int = mp_out.find(fence)
+    if start == -1:
+        raise ValueError(f"No {code_type} code block found in response.")
+    start += len(fence)
+    # an unterminated block runs to the end of the response
+    end: int = mp_out.find("```", start)
+    return mp_out[start:] if end == -1 else mp_out[start:end]
+
+
+@functools.lru_cache(maxsize=8)
+def _load_schema(schema_path: str, mtime: float) -> etree.XMLSchema:
+    # mtime is only part of the cache key, so editing the XSD recompiles it
+    # libxml2 reads the file itself, no intermediate bytes object
+    return etree.XMLSchema(etree.parse(schema_path))
 
 
 def validate_output(schema_path: str, xml_mp: str):
-    # Parse the XSD file
-    with open(schema_path, "rb") as schema_file:
-        schema_root = etree.XML(schema_file.read())
-    schema = etree.XMLSchema(schema_root)
+    # Compiled XSD, reused across calls until the file changes
+    schema: etree.XMLSchema = _load_schema(schema_path, os.path.getmtime(schema_path))
 
     # Parse the XML file
-    root: etree._Element = etree.fromstring(xml_mp)
+    root: etree._Element = etree.fromstring(xml_mp, _PARSER)
 
     # Validate the XML file against the XSD schema
     schema.assertValid(root)
@@ -41,18 +65,22 @@ def count_xml_tasks(xml_mp: str):
     task_count: int = 0
 
     # we're parsing before validation, so be careful
-    bt: etree._Element = root.find(ControlTags.BehaviorTree)
-
-    fallback: etree._Element = (
-        bt.findall(".//" + ControlTags.Fallback) if bt is not None else None
-    )
-
-    # count Conditionals only under Fallbacks
-    for fb in fallback:
-        task_count += len(fb.findall(ControlTags.Sequence))
-
-    # count Actions
-    for a in ActionTags:
-        task_count += len(root.findall(".//" + a))
+    bt: etree._Element | None = root.find(_BEHAVIOR_TREE_TAG)
+    in_bt: bool = False
+
+    # one walk counts both Actions and the Sequences under Fallbacks
+    for event, el in etree.iterwalk(root, events=("start", "end")):
+        if el is bt:
+            in_bt = event == "start"
+            continue
+        if event == "end" or el is root:
+            continue
+        tag = el.tag
+        # count Actions
+        if tag in _ACTION_TAGS:
+            task_count += 1
+        # count Conditionals only under Fallbacks
+        elif in_bt and tag == _SEQUENCE_TAG and el.getparent().tag == _FALLBACK_TAG:
+            task_count += 1
 
     return task_count
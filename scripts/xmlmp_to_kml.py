@@ -6,10 +6,126 @@ This script parses XML task files containing GPS coordinates and generates
 KML files for visualization in Google Earth.
 """
 
-import xml.etree.ElementTree as ET
 import argparse
 import os
 
+from lxml import etree
+
+# namespace of the older task-template mission format
+_TASK_NS = "https://robotics.ucmerced.edu/task"
+NAMESPACE = {"task": _TASK_NS}
+
+# Clark-notation tags, so find() doesn't resolve the "task:" prefix on every call
+_ATOMIC_TASKS_TAG = f"{{{_TASK_NS}}}AtomicTasks"
+_ATOMIC_TASK_TAG = f"{{{_TASK_NS}}}AtomicTask"
+_TASK_ID_TAG = f"{{{_TASK_NS}}}TaskID"
+_TASK_DESCRIPTION_TAG = f"{{{_TASK_NS}}}TaskDescription"
+_LATITUDE_TAG = f"{{{_TASK_NS}}}latitude"
+_LONGITUDE_TAG = f"{{{_TASK_NS}}}longitude"
+_CONDITIONAL_TAG = f"{{{_TASK_NS}}}Conditional"
+_COMPARATOR_TAG = f"{{{_TASK_NS}}}Comparator"
+_HARD_VALUE_TAG = f"{{{_TASK_NS}}}HardValue"
+_SEQUENCE_TAG = f"{{{_TASK_NS}}}Sequence"
+_CONDITIONAL_ACTIONS_TAG = f"{{{_TASK_NS}}}ConditionalActions"
+
+# compiled once: the GPS move of an AtomicTask whose first Action is moveToGPSLocation
+_XP_TASK_GPS_MOVE = etree.XPath(
+    "task:Action[1][task:ActionType[1] = 'moveToGPSLocation']"
+    "/task:moveToGPSLocation[1]",
+    namespaces=NAMESPACE,
+)
+_XP_TASK_INFO = etree.XPath("task:CompositeTaskInformation[1]", namespaces=NAMESPACE)
+_XP_MAIN_SEQUENCE = etree.XPath(
+    "task:ActionSequence[1]/task:Sequence[1]", namespaces=NAMESPACE
+)
+
+# readable form of a Conditional's Comparator, for condition descriptions
+_COMPARATOR_TEXT = {
+    "lt": "less than",
+    "gt": "greater than",
+    "eq": "equal to",
+    "le": "less than or equal to",
+    "ge": "greater than or equal to",
+    "ne": "not equal to",
+}
+
+# one C pass over the text instead of a replace() per entity
+_XML_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+# static head of every KML document, only the mission name and description vary
+_KML_HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2" xmlns:gx="http://www.google.com/kml/ext/2.2">
+  <Document>
+    <name>%s</name>
+    <description>%s</description>
+
+    <!-- Styles for different elements -->
+    <Style id="waypointStyle">
+      <IconStyle>
+        <Icon>
+          <href>http://maps.google.com/mapfiles/kml/shapes/target.png</href>
+          <scale>1.2</scale>
+        </Icon>
+        <color>ff0000ff</color>
+      </IconStyle>
+      <LabelStyle>
+        <scale>1.0</scale>
+      </LabelStyle>
+    </Style>
+
+    <Style id="pathStyle">
+      <LineStyle>
+        <color>ff0000ff</color>
+        <width>3</width>
+      </LineStyle>
+    </Style>
+"""
+
+
+def _xml_text(value):
+    """
+    Escape a mission value for use as KML element text.
+
+    Args:
+        value: Text (or None) taken from the mission file
+
+    Returns:
+        str: Value with &, <, > and " escaped
+    """
+    return str(value).translate(_XML_ESCAPE)
+
+
+def _read_gps_waypoint(atomic_task):
+    """
+    Build the waypoint for an old-format AtomicTask, if it is a GPS move.
+
+    Args:
+        atomic_task (Element): task:AtomicTask element
+
+    Returns:
+        dict | None: Waypoint, or None when the task has no complete GPS move
+    """
+    for gps_location in _XP_TASK_GPS_MOVE(atomic_task):
+        lat_elem = gps_location.find(_LATITUDE_TAG)
+        lon_elem = gps_location.find(_LONGITUDE_TAG)
+
+        if lat_elem is not None and lon_elem is not None:
+            task_id_elem = atomic_task.find(_TASK_ID_TAG)
+            task_desc_elem = atomic_task.find(_TASK_DESCRIPTION_TAG)
+            return {
+                "task_id": (
+                    task_id_elem.text if task_id_elem is not None else "Unknown"
+                ),
+                "description": (
+                    task_desc_elem.text
+                    if task_desc_elem is not None
+                    else "No description"
+                ),
+                "latitude": float(lat_elem.text),
+                "longitude": float(lon_elem.text),
+            }
+    return None
+
 
 def parse_xml_mission(xml_file_path):
     """
@@ -21,9 +137,47 @@ def parse_xml_mission(xml_file_path):
     Returns:
         dict: Contains mission info and list of waypoints
     """
-    # Parse the XML file
-    tree = ET.parse(xml_file_path)
-    root = tree.getroot()
+    # Parse the XML file; old-format AtomicTasks are read and freed as they
+    # close, so the DOM never holds more than one of them at a time
+    gps_waypoints = []
+    first_atomic_tasks = None
+    context = etree.iterparse(
+        xml_file_path,
+        events=("end",),
+        tag=_ATOMIC_TASK_TAG,
+        # ET drops comments and PIs while parsing, keep the tree the same shape
+        remove_comments=True,
+        remove_pis=True,
+        # indentation between elements is never read, don't allocate text for it
+        remove_blank_text=True,
+        # deeply nested sequences are walked iteratively, don't cap depth at 256
+        huge_tree=True,
+    )
+    for _, atomic_task in context:
+        atomic_tasks = atomic_task.getparent()
+        # only the first AtomicTasks block directly under the root holds waypoints
+        if first_atomic_tasks is None:
+            owner = atomic_tasks.getparent() if atomic_tasks is not None else None
+            if (
+                owner is None
+                or atomic_tasks.tag != _ATOMIC_TASKS_TAG
+                or owner.getparent() is not None
+                or owner.find(_ATOMIC_TASKS_TAG) is not atomic_tasks
+            ):
+                continue
+            first_atomic_tasks = atomic_tasks
+        elif atomic_tasks is not first_atomic_tasks:
+            continue
+
+        waypoint = _read_gps_waypoint(atomic_task)
+        if waypoint is not None:
+            gps_waypoints.append(waypoint)
+
+        atomic_task.clear()
+        while atomic_task.getprevious() is not None:
+            del atomic_tasks[0]
+
+    root = context.root
 
     # Try to parse new BehaviorTree format first
     mission_elem = root.find("Mission")
@@ -68,58 +222,21 @@ def parse_xml_mission(xml_file_path):
 
     else:
         # Try to parse old format with namespaces
-        namespace = {"task": "https://robotics.ucmerced.edu/task"}
 
         # Extract mission information
-        task_info = root.find("task:CompositeTaskInformation", namespace)
+        task_info = next(iter(_XP_TASK_INFO(root)), None)
+        has_task_info = task_info is not None and len(task_info) > 0
         task_id = (
-            task_info.find("task:TaskID", namespace).text
-            if task_info
-            else "Unknown Mission"
+            task_info.find(_TASK_ID_TAG).text if has_task_info else "Unknown Mission"
         )
         task_description = (
-            task_info.find("task:TaskDescription", namespace).text
-            if task_info
+            task_info.find(_TASK_DESCRIPTION_TAG).text
+            if has_task_info
             else "No description"
         )
 
-        # Extract waypoints from atomic tasks
-        waypoints = []
-        atomic_tasks = root.find("task:AtomicTasks", namespace)
-
-        if atomic_tasks:
-            for atomic_task in atomic_tasks.findall("task:AtomicTask", namespace):
-                task_id_elem = atomic_task.find("task:TaskID", namespace)
-                task_desc_elem = atomic_task.find("task:TaskDescription", namespace)
-                action = atomic_task.find("task:Action", namespace)
-
-                if action:
-                    action_type = action.find("task:ActionType", namespace)
-                    if (
-                        action_type is not None
-                        and action_type.text == "moveToGPSLocation"
-                    ):
-                        gps_location = action.find("task:moveToGPSLocation", namespace)
-                        if gps_location:
-                            lat_elem = gps_location.find("task:latitude", namespace)
-                            lon_elem = gps_location.find("task:longitude", namespace)
-
-                            if lat_elem is not None and lon_elem is not None:
-                                waypoint = {
-                                    "task_id": (
-                                        task_id_elem.text
-                                        if task_id_elem is not None
-                                        else "Unknown"
-                                    ),
-                                    "description": (
-                                        task_desc_elem.text
-                                        if task_desc_elem is not None
-                                        else "No description"
-                                    ),
-                                    "latitude": float(lat_elem.text),
-                                    "longitude": float(lon_elem.text),
-                                }
-                                waypoints.append(waypoint)
+        # Waypoints were extracted from the atomic tasks while parsing
+        waypoints = gps_waypoints
 
         # Extract action sequence for path ordering and conditional logic
         sequence_order = []
@@ -129,70 +246,73 @@ def parse_xml_mission(xml_file_path):
         )  # Maps conditional group ID to condition description
         conditional_counter = 0
 
-        def parse_sequence_element(element, parent_conditional_id=None):
+        def handle_task_id(child, parent_conditional_id):
+            task_id = child.text
+            sequence_order.append(task_id)
+            if parent_conditional_id is not None:
+                conditional_tasks.setdefault(parent_conditional_id, []).append(task_id)
+            return None
+
+        def handle_conditional_actions(child, parent_conditional_id):
             nonlocal conditional_counter
 
-            for child in element:
-                if child.tag.endswith("TaskID"):
-                    task_id = child.text
-                    sequence_order.append(task_id)
-                    if parent_conditional_id is not None:
-                        if parent_conditional_id not in conditional_tasks:
-                            conditional_tasks[parent_conditional_id] = []
-                        conditional_tasks[parent_conditional_id].append(task_id)
-
-                elif child.tag.endswith("ConditionalActions"):
-                    # Extract condition information
-                    conditional_counter += 1
-                    current_conditional_id = f"conditional_{conditional_counter}"
-
-                    # Parse the condition
-                    conditional_elem = child.find("task:Conditional", namespace)
-                    condition_desc = "Unknown condition"
-                    if conditional_elem is not None:
-                        comparator_elem = conditional_elem.find(
-                            "task:Comparator", namespace
-                        )
-                        hard_value_elem = conditional_elem.find(
-                            "task:HardValue", namespace
-                        )
-
-                        if comparator_elem is not None and hard_value_elem is not None:
-                            comparator = comparator_elem.text
-                            value = hard_value_elem.text
-
-                            # Convert comparator to readable format
-                            comparator_map = {
-                                "lt": "less than",
-                                "gt": "greater than",
-                                "eq": "equal to",
-                                "le": "less than or equal to",
-                                "ge": "greater than or equal to",
-                                "ne": "not equal to",
-                            }
-                            readable_comparator = comparator_map.get(
-                                comparator, comparator
-                            )
-                            condition_desc = (
-                                f"if value is {readable_comparator} {value}"
-                            )
-
-                    conditional_conditions[current_conditional_id] = condition_desc
-
-                    # Parse the conditional sequence
-                    conditional_sequence = child.find("task:Sequence", namespace)
-                    if conditional_sequence is not None:
-                        parse_sequence_element(
-                            conditional_sequence, current_conditional_id
-                        )
-
-                elif child.tag.endswith("Sequence"):
-                    parse_sequence_element(child, parent_conditional_id)
-
-        action_sequence = root.find("task:ActionSequence", namespace)
-        if action_sequence:
-            sequence = action_sequence.find("task:Sequence", namespace)
-            if sequence:
+            # Extract condition information
+            conditional_counter += 1
+            current_conditional_id = f"conditional_{conditional_counter}"
+
+            # Parse the condition
+            conditional_elem = child.find(_CONDITIONAL_TAG)
+            condition_desc = "Unknown condition"
+            if conditional_elem is not None:
+                comparator_elem = conditional_elem.find(_COMPARATOR_TAG)
+                hard_value_elem = conditional_elem.find(_HARD_VALUE_TAG)
+
+                if comparator_elem is not None and hard_value_elem is not None:
+                    comparator = comparator_elem.text
+                    value = hard_value_elem.text
+
+                    # Convert comparator to readable format
+                    readable_comparator = _COMPARATOR_TEXT.get(comparator, comparator)
+                    condition_desc = f"if value is {readable_comparator} {value}"
+
+            conditional_conditions[current_conditional_id] = condition_desc
+
+            # Parse the conditional sequence
+            conditional_sequence = child.find(_SEQUENCE_TAG)
+            if conditional_sequence is not None:
+                return conditional_sequence, current_conditional_id
+            return None
+
+        def handle_sequence(child, parent_conditional_id):
+            return child, parent_conditional_id
+
+        # one hash lookup per child on its full tag; handlers return the
+        # (sequence, conditional id) to descend into, if any
+        dispatch = {
+            _TASK_ID_TAG: handle_task_id,
+            _CONDITIONAL_ACTIONS_TAG: handle_conditional_actions,
+            _SEQUENCE_TAG: handle_sequence,
+        }
+
+        def parse_sequence_element(element, parent_conditional_id=None):
+            # explicit stack of child iterators keeps the recursive pre-order
+            # (and so the conditional numbering) without a frame per level
+            stack = [(iter(element), parent_conditional_id)]
+            while stack:
+                children, conditional_id = stack[-1]
+                child = next(children, None)
+                if child is None:
+                    stack.pop()
+                    continue
+                handler = dispatch.get(child.tag)
+                if handler is not None:
+                    nested = handler(child, conditional_id)
+                    if nested is not None:
+                        stack.append((iter(nested[0]), nested[1]))
+
+        # first Sequence of the ActionSequence, only walked if it has children
+        for sequence in _XP_MAIN_SEQUENCE(root)[:1]:
+            if len(sequence) > 0:
                 parse_sequence_element(sequence)
 
         return {
@@ -205,13 +325,13 @@ def parse_xml_mission(xml_file_path):
         }
 
 
-def create_kml(mission_data, output_file):
+def write_kml(mission_data, f):
     """
-    Create a KML file from the mission data.
+    Write the KML document for the mission data to an open text file.
 
     Args:
         mission_data (dict): Mission data containing waypoints
-        output_file (str): Output KML file path
+        f (TextIO): File the KML is streamed into
     """
     # Define colors for conditional task groups (cycling through different colors)
     conditional_colors = [
@@ -233,37 +353,34 @@ def create_kml(mission_data, output_file):
         for task_id in task_list:
             task_to_conditional[task_id] = group_id
 
-    kml_content = f"""<?xml version="1.0" encoding="UTF-8"?>
-<kml xmlns="http://www.opengis.net/kml/2.2">
-  <Document>
-    <name>{mission_data['mission_id']}</name>
-    <description>{mission_data['mission_description']}</description>
-
-    <!-- Styles for different elements -->
-    <Style id="waypointStyle">
-      <IconStyle>
-        <Icon>
-          <href>http://maps.google.com/mapfiles/kml/shapes/target.png</href>
-          <scale>1.2</scale>
-        </Icon>
-        <color>ff0000ff</color>
-      </IconStyle>
-      <LabelStyle>
-        <scale>1.0</scale>
-      </LabelStyle>
-    </Style>
-
-    <Style id="pathStyle">
-      <LineStyle>
-        <color>ff0000ff</color>
-        <width>3</width>
-      </LineStyle>
-    </Style>
-"""
+    # coordinates are kept as parallel lat/lon columns for the geometry below
+    lats = [wp["latitude"] for wp in mission_data["waypoints"]]
+    lons = [wp["longitude"] for wp in mission_data["waypoints"]]
+    # each "lon,lat,0" is formatted once and reused by every element that draws it
+    waypoint_coords_str = [f"{lon},{lat},0" for lon, lat in zip(lons, lats)]
+    # shared by the main path and the complete sequence folder
+    coord_map = {
+        wp["task_id"]: coord
+        for wp, coord in zip(mission_data["waypoints"], waypoint_coords_str)
+    }
+    conditional_conditions = mission_data.get("conditional_conditions", {})
+
+    # fragments go straight to the buffered file, the document is never held whole
+    write = f.write
+    write(
+        _KML_HEADER
+        % (
+            _xml_text(mission_data["mission_id"]),
+            _xml_text(mission_data["mission_description"]),
+        )
+    )
 
-    # Add styles for conditional waypoints
+    # Add styles for conditional waypoints and paths in one pass; the path
+    # styles are held back so they still follow all the waypoint styles
+    path_styles = []
     for group_id, color in conditional_group_colors.items():
-        kml_content += f"""    <Style id="conditionalStyle_{group_id}">
+        write(
+            f"""    <Style id="conditionalStyle_{group_id}">
       <IconStyle>
         <Icon>
           <href>http://maps.google.com/mapfiles/kml/shapes/question-mark.png</href>
@@ -277,10 +394,9 @@ def create_kml(mission_data, output_file):
       </LabelStyle>
     </Style>
 """
-
-    # Add styles for conditional paths
-    for group_id, color in conditional_group_colors.items():
-        kml_content += f"""    <Style id="conditionalPathStyle_{group_id}">
+        )
+        path_styles.append(
+            f"""    <Style id="conditionalPathStyle_{group_id}">
       <LineStyle>
         <color>{color}</color>
         <width>2</width>
@@ -288,60 +404,63 @@ def create_kml(mission_data, output_file):
       </LineStyle>
     </Style>
 """
+        )
+    write("".join(path_styles))
 
-    kml_content += """
+    write(
+        """
     <!-- Waypoint Placemarks -->
 """
+    )
 
     # Add waypoints as placemarks
-    waypoint_coords = []
     conditional_waypoints = {}  # Group conditional waypoints by group ID
+    tc_get = task_to_conditional.get
+
+    for waypoint, coord in zip(mission_data["waypoints"], waypoint_coords_str):
+        tid = waypoint["task_id"]
+        desc = waypoint["description"]
 
-    for i, waypoint in enumerate(mission_data["waypoints"]):
         # Check if this waypoint is part of a conditional task
-        conditional_group = task_to_conditional.get(waypoint["task_id"])
+        conditional_group = tc_get(tid)
 
         if conditional_group:
             # This is a conditional waypoint
-            condition_desc = mission_data.get("conditional_conditions", {}).get(
+            condition_desc = conditional_conditions.get(
                 conditional_group, "Unknown condition"
             )
             style_url = f"#conditionalStyle_{conditional_group}"
-            description = (
-                f"{waypoint['description']}\n\nConditional Task: {condition_desc}"
-            )
+            description = f"{desc}\n\nConditional Task: {condition_desc}"
 
             # Store for conditional path creation
-            if conditional_group not in conditional_waypoints:
-                conditional_waypoints[conditional_group] = []
-            conditional_waypoints[conditional_group].append(waypoint)
+            conditional_waypoints.setdefault(conditional_group, []).append(coord)
         else:
             # Regular waypoint
             style_url = "#waypointStyle"
-            description = waypoint["description"]
+            description = desc
 
-        kml_content += f"""    <Placemark>
-      <name>{waypoint['task_id']}</name>
-      <description>{description}</description>
+        write(
+            f"""    <Placemark>
+      <name>{_xml_text(tid)}</name>
+      <description>{_xml_text(description)}</description>
       <styleUrl>{style_url}</styleUrl>
       <Point>
-        <coordinates>{waypoint['longitude']},{waypoint['latitude']},0</coordinates>
+        <coordinates>{coord}</coordinates>
       </Point>
     </Placemark>
 """
-        waypoint_coords.append((waypoint["longitude"], waypoint["latitude"]))
+        )
 
     # Add main mission path (connecting non-conditional waypoints in sequence order)
-    regular_sequence = []
-    if mission_data["sequence_order"]:
-        waypoint_map = {wp["task_id"]: wp for wp in mission_data["waypoints"]}
-
-        for task_id in mission_data["sequence_order"]:
-            if task_id in waypoint_map and task_id not in task_to_conditional:
-                regular_sequence.append(waypoint_map[task_id])
+    regular_sequence = [
+        coord_map[task_id]
+        for task_id in mission_data["sequence_order"]
+        if task_id in coord_map and task_id not in task_to_conditional
+    ]
 
     if len(regular_sequence) > 1:
-        kml_content += f"""
+        write(
+            f"""
     <!-- Main Mission Path -->
     <Placemark>
       <name>Main Mission Path</name>
@@ -351,23 +470,27 @@ def create_kml(mission_data, output_file):
         <tessellate>1</tessellate>
         <coordinates>
 """
+        )
 
-        for wp in regular_sequence:
-            kml_content += f'          {wp["longitude"]},{wp["latitude"]},0\n'
+        for coord in regular_sequence:
+            write(f"          {coord}\n")
 
-        kml_content += """        </coordinates>
+        write(
+            """        </coordinates>
       </LineString>
     </Placemark>
 """
+        )
 
     # Add conditional paths
     for group_id, waypoints_in_group in conditional_waypoints.items():
         if len(waypoints_in_group) > 0:
-            condition_desc = mission_data.get("conditional_conditions", {}).get(
-                group_id, "Unknown condition"
+            condition_desc = _xml_text(
+                conditional_conditions.get(group_id, "Unknown condition")
             )
 
-            kml_content += f"""
+            write(
+                f"""
     <!-- Conditional Path: {group_id} -->
     <Placemark>
       <name>Conditional Path ({condition_desc})</name>
@@ -377,18 +500,22 @@ def create_kml(mission_data, output_file):
         <tessellate>1</tessellate>
         <coordinates>
 """
+            )
 
-            for wp in waypoints_in_group:
-                kml_content += f'          {wp["longitude"]},{wp["latitude"]},0\n'
+            for coord in waypoints_in_group:
+                write(f"          {coord}\n")
 
-            kml_content += """        </coordinates>
+            write(
+                """        </coordinates>
       </LineString>
     </Placemark>
 """
+            )
 
     # Add complete mission path (all waypoints in order) as a folder
-    if len(waypoint_coords) > 1 and mission_data["sequence_order"]:
-        kml_content += f"""
+    if len(lats) > 1 and mission_data["sequence_order"]:
+        write(
+            f"""
     <Folder>
       <name>Complete Mission Sequence</name>
       <description>All tasks including conditional ones in execution order</description>
@@ -405,24 +532,25 @@ def create_kml(mission_data, output_file):
           <tessellate>1</tessellate>
           <coordinates>
 """
+        )
 
         # Order coordinates according to complete sequence
-        waypoint_map = {wp["task_id"]: wp for wp in mission_data["waypoints"]}
-
         for task_id in mission_data["sequence_order"]:
-            if task_id in waypoint_map:
-                wp = waypoint_map[task_id]
-                kml_content += f'            {wp["longitude"]},{wp["latitude"]},0\n'
+            if task_id in coord_map:
+                write(f"            {coord_map[task_id]}\n")
 
-        kml_content += """          </coordinates>
+        write(
+            """          </coordinates>
         </LineString>
       </Placemark>
     </Folder>
 """
+        )
 
     # Add bounding polygon if we have 4 corner points
-    if len(waypoint_coords) == 4:
-        kml_content += f"""
+    if len(lats) == 4:
+        write(
+            f"""
     <!-- Farm Boundary -->
     <Placemark>
       <name>Farm Boundary</name>
@@ -442,60 +570,67 @@ def create_kml(mission_data, output_file):
           <LinearRing>
             <coordinates>
 """
+        )
 
         # Sort waypoints to form a proper rectangle (assuming corners)
         # Find corners: NW, NE, SE, SW
-        waypoints_with_coords = [
-            (wp["latitude"], wp["longitude"], wp) for wp in mission_data["waypoints"]
-        ]
-        waypoints_with_coords.sort(key=lambda x: (x[0], x[1]))  # Sort by lat, then lon
-
-        # Group into north (higher lat) and south (lower lat)
-        mid_lat = (waypoints_with_coords[0][0] + waypoints_with_coords[-1][0]) / 2
-        north_points = [wp for wp in waypoints_with_coords if wp[0] >= mid_lat]
-        south_points = [wp for wp in waypoints_with_coords if wp[0] < mid_lat]
+        # Group into north (higher lat) and south (lower lat) in one linear pass
+        mid_lat = (min(lats) + max(lats)) / 2
+        north_points = [i for i, lat in enumerate(lats) if lat >= mid_lat]
+        south_points = [i for i, lat in enumerate(lats) if lat < mid_lat]
 
-        # Sort each group by longitude to get west/east
-        north_points.sort(key=lambda x: x[1])  # NW, NE
-        south_points.sort(key=lambda x: x[1])  # SW, SE
+        # Sort each group by longitude (then latitude) to get west/east
+        lon_lat = list(zip(lons, lats))
+        north_points.sort(key=lon_lat.__getitem__)  # NW, NE
+        south_points.sort(key=lon_lat.__getitem__)  # SW, SE
 
         # Create rectangle: NW -> NE -> SE -> SW -> NW
         if len(north_points) >= 1 and len(south_points) >= 1:
             corners = []
             if len(north_points) == 2:
-                corners.extend([north_points[0][2], north_points[1][2]])  # NW, NE
+                corners.extend([north_points[0], north_points[1]])  # NW, NE
             else:
-                corners.append(north_points[0][2])
+                corners.append(north_points[0])
 
             if len(south_points) == 2:
-                corners.extend([south_points[1][2], south_points[0][2]])  # SE, SW
+                corners.extend([south_points[1], south_points[0]])  # SE, SW
             else:
-                corners.append(south_points[0][2])
+                corners.append(south_points[0])
 
             # Add coordinates for the polygon
             for corner in corners:
-                kml_content += (
-                    f'              {corner["longitude"]},{corner["latitude"]},0\n'
-                )
+                write(f"              {waypoint_coords_str[corner]}\n")
 
             # Close the polygon by returning to first point
             if corners:
-                first_corner = corners[0]
-                kml_content += f'              {first_corner["longitude"]},{first_corner["latitude"]},0\n'
+                write(f"              {waypoint_coords_str[corners[0]]}\n")
 
-        kml_content += """            </coordinates>
+        write(
+            """            </coordinates>
           </LinearRing>
         </outerBoundaryIs>
       </Polygon>
     </Placemark>
 """
+        )
 
-    kml_content += """  </Document>
+    write(
+        """  </Document>
 </kml>"""
+    )
 
+
+def create_kml(mission_data, output_file):
+    """
+    Create a KML file from the mission data.
+
+    Args:
+        mission_data (dict): Mission data containing waypoints
+        output_file (str): Output KML file path
+    """
     # Write KML file
     with open(output_file, "w", encoding="utf-8") as f:
-        f.write(kml_content)
+        write_kml(mission_data, f)
 
     print(f"KML file created successfully: {output_file}")
     print(f"Mission: {mission_data['mission_id']}")
@@ -561,7 +696,7 @@ def main():
             f"\nYou can now open '{args.output}' in Google Earth to visualize the mission."
         )
 
-    except ET.ParseError as e:
+    except etree.XMLSyntaxError as e:
         print(f"Error parsing XML file: {e}")
         return 1
     except Exception as e:
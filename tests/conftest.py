@@ -0,0 +1,10 @@
+import os
+import sys
+
+REPO_ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# app/ modules import each other as top-level modules (utils.*, network_interface)
+# while utils.xml_utils imports app.xml_types, so both roots have to be importable
+for path in (REPO_ROOT, os.path.join(REPO_ROOT, "app")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,132 @@
+import logging
+import sys
+import types
+
+import pytest
+
+from utils.os_utils import write_out_file
+
+SCHEMA: str = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+  <xs:element name="root">
+    <xs:complexType>
+      <xs:sequence>
+        <xs:element name="MoveToGPSLocation" maxOccurs="unbounded">
+          <xs:complexType>
+            <xs:attribute name="latitude" type="xs:double" use="required"/>
+            <xs:attribute name="longitude" type="xs:double" use="required"/>
+          </xs:complexType>
+        </xs:element>
+      </xs:sequence>
+      <xs:attribute name="schema_location" type="xs:string"/>
+    </xs:complexType>
+  </xs:element>
+</xs:schema>
+"""
+
+
+class StubLLM:
+    """Stands in for LLMInterface, always answering with the same mission."""
+
+    response: str = ""
+
+    def __init__(self):
+        self.initial_context_length: int = 0
+        self.prompts: list[str] = []
+
+    def init_context(self, schema_paths, context_files) -> None:
+        pass
+
+    def reset_context(self, context_count: int) -> None:
+        pass
+
+    def ask_gpt(self, prompt: str, model: str, add_context: bool = False) -> str:
+        self.prompts.append(prompt)
+        return "```xml\n" + self.response + "```"
+
+
+class StubTreePlacementGenerator:
+    """Resolves tree 1 to a fixed coordinate, writing a new file like the real one."""
+
+    def generate_tree_points(self) -> list:
+        return []
+
+    def replace_tree_ids_in_file(self, xml_path: str) -> str:
+        with open(xml_path) as f:
+            xml: str = f.read()
+        resolved: str = xml.replace(
+            '<MoveToTreeID id="1"/>',
+            '<MoveToGPSLocation latitude="37.26" longitude="-120.42"/>',
+        )
+        return write_out_file(str(self.log_directory), resolved)
+
+
+class StubNetworkInterface:
+    def __init__(self):
+        self.sent: list[str] = []
+        self.closed: bool = False
+
+    def send_file(self, file_path: str) -> None:
+        with open(file_path) as f:
+            self.sent.append(f.read())
+
+    def close_socket(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def planner(tmp_path, monkeypatch):
+    # litellm is slow to import and needs credentials, the planner only needs the API
+    monkeypatch.setitem(
+        sys.modules, "gpt_interface", types.SimpleNamespace(LLMInterface=StubLLM)
+    )
+    from mission_planner import MissionPlanner
+
+    schema_path = tmp_path / "mission.xsd"
+    schema_path.write_text(SCHEMA)
+    tpg = StubTreePlacementGenerator()
+    tpg.log_directory = tmp_path
+    mp = MissionPlanner(
+        token_path="",
+        schema_paths=[],
+        context_files=[],
+        tpg=tpg,
+        max_retries=3,
+        log_directory=str(tmp_path),
+        logger=logging.getLogger(__name__),
+    )
+    mp.nic = StubNetworkInterface()
+    monkeypatch.setattr("builtins.input", lambda prompt: "visit tree 1")
+    return mp, schema_path
+
+
+def test_run_sends_gps_resolved_mission(planner):
+    mp, schema_path = planner
+    StubLLM.response = (
+        f'<root schema_location="{schema_path}"><MoveToTreeID id="1"/></root>'
+    )
+
+    mp.run()
+
+    assert len(mp.nic.sent) == 1
+    assert "MoveToGPSLocation" in mp.nic.sent[0]
+    assert "MoveToTreeID" not in mp.nic.sent[0]
+    assert mp.nic.closed
+    # the LLM's own mission stays in the log directory next to the resolved copy
+    logged = [p.read_text() for p in schema_path.parent.iterdir() if p != schema_path]
+    assert StubLLM.response in logged
+
+
+def test_run_retries_when_resolved_mission_fails_lint(planner):
+    mp, schema_path = planner
+    # tree 2 is never resolved, so the schema rejects every mission
+    StubLLM.response = (
+        f'<root schema_location="{schema_path}"><MoveToTreeID id="2"/></root>'
+    )
+
+    mp.run()
+
+    assert mp.nic.sent == []
+    assert mp.retry == mp.max_retries
+    # the validation error is fed back as the next prompt
+    assert "MoveToTreeID" in mp.gpt.prompts[-1]